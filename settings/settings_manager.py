@@ -6,11 +6,16 @@ Date: 2024
 
 This module provides a SettingsManager convenience class for handling settings and configuration files in JSON, YAML, TOML, and INI formats. It is provided "as is" for anyone to use, modify, and distribute, freely and openly. While not required, credit back to the original author is appreciated.
 
+YAML files are read and written with PyYAML's libyaml-backed CSafeLoader and CSafeDumper when PyYAML was built against libyaml,
+which is several times faster than the pure-Python loader. The binary wheels on PyPI include libyaml; when installing PyYAML from a
+source distribution, install the libyaml development headers first so the C extension is built. A warning is logged once when the
+pure-Python loader is used instead.
+
 This module is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
 """
 
 from __future__ import annotations
-from logging import Logger
+from logging import Logger, INFO
 from typing import (
     Dict,
     Optional,
@@ -21,17 +26,44 @@ from typing import (
     List,
     Tuple,
     Type,
+    Deque,
+    ClassVar,
+    Set,
+    Union,
     TYPE_CHECKING,
+    get_type_hints,
 )
 from pathlib import Path
-from json import load, dump
-from configparser import ConfigParser
+from json import load, dumps
+from configparser import ConfigParser, Error as ConfigParserError
 from atexit import register
-from dacite import from_dict
-from dataclasses import asdict, is_dataclass
-from platform import system, version, architecture, python_version
+from dataclasses import fields, is_dataclass
+from functools import cache, cached_property
 from abc import ABC, abstractmethod
 from copy import deepcopy
+from collections import defaultdict, deque
+from collections.abc import Mapping
+from hashlib import blake2b
+from io import BytesIO, StringIO
+from os import (
+    O_RDONLY,
+    chmod,
+    close,
+    fdopen,
+    fstat,
+    fsync,
+    open as os_open,
+    replace,
+    umask,
+)
+from mmap import mmap, ACCESS_READ
+from sys import intern, platform
+from tempfile import mkstemp
+from threading import local
+
+if platform != "win32":
+    # Not available on Windows, see _fsync_directory.
+    from os import O_DIRECTORY
 
 from .exceptions import (
     InvalidPathError,
@@ -47,35 +79,535 @@ from .decorators import toggle_autosave_off
 
 if TYPE_CHECKING:
     from _typeshed import DataclassInstance
+    from yaml import load as yaml_load, dump as yaml_dump
+    from toml import dump as toml_dump, load as toml_load
+    import tomllib
+    import tomli_w
+    from cattrs import Converter
+    from dacite import from_dict
+    from mashumaro import DataClassDictMixin
+    import msgspec
+    import ijson  # type: ignore[import-untyped]
+    import orjson
+
+    # Either the libyaml-backed or the pure-Python safe loader and dumper, see _load_yaml_module.
+    YamlLoader: Type[Any]
+    YamlDumper: Type[Any]
 
 
 T = TypeVar("T")
 
-# Initialize flags indicating the availability of optional modules
+# Flags indicating the availability of optional modules. These are set by the
+# _load_*_module functions below, which import the modules on first use so that
+# only the modules needed for the chosen format and settings type are imported.
 yaml_available = False
+yaml_c_available = False
 toml_available = False
+tomllib_available = False
+tomli_w_available = False
+cattrs_available = False
+dacite_available = False
+orjson_available = False
+mashumaro_available = False
+msgspec_available = False
+ijson_available = False
 logging_available = False
 
-# Attempt to import optional modules and set flags accordingly
-try:
-    from yaml import safe_load, safe_dump
+
+@cache
+def _load_yaml_module() -> bool:
+    """
+    Imports the yaml module on first use, preferring the libyaml-backed loader and dumper.
+
+    Returns:
+        bool: True if the yaml module is available, False otherwise.
+    """
+    global yaml_available, yaml_c_available
+    global yaml_load, yaml_dump, YamlLoader, YamlDumper
+    try:
+        import yaml
+    except ImportError:
+        return False
+
+    yaml_load, yaml_dump = yaml.load, yaml.dump
+    # CSafeLoader and CSafeDumper only exist when PyYAML was built with libyaml.
+    YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    YamlDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+    yaml_c_available = YamlLoader is not yaml.SafeLoader
 
     yaml_available = True
-except ImportError:
-    pass
+    return True
+
+
+@cache
+def _load_toml_module() -> bool:
+    """
+    Imports the TOML modules on first use: tomllib (or tomli) for reading, tomli_w for writing, and the toml module as a fallback for both.
+
+    tomllib and tomli_w are preferred, as they are faster than the toml module, which is then only needed if either is missing.
+
+    Returns:
+        bool: True if TOML files can be both read and written, False otherwise. The modules used are reported through
+        tomllib_available, tomli_w_available and toml_available.
+    """
+    global toml_available, tomllib_available, tomli_w_available
+    global toml_dump, toml_load, tomllib, tomli_w
+    try:
+        import tomllib
+
+        tomllib_available = True
+    except ImportError:
+        try:
+            import tomli as tomllib  # type: ignore[no-redef, import-not-found]
+
+            tomllib_available = True
+        except ImportError:
+            pass
+
+    try:
+        import tomli_w
+
+        tomli_w_available = True
+    except ImportError:
+        pass
+
+    try:
+        from toml import dump as toml_dump, load as toml_load
+
+        toml_available = True
+    except ImportError:
+        pass
+
+    return (tomllib_available or toml_available) and (
+        tomli_w_available or toml_available
+    )
+
+
+@cache
+def _load_orjson() -> bool:
+    """
+    Imports orjson on first use.
+
+    Returns:
+        bool: True if orjson is available, False otherwise.
+    """
+    global orjson_available, orjson
+    try:
+        import orjson
+    except ImportError:
+        return False
+
+    orjson_available = True
+    return True
+
+
+@cache
+def _load_cattrs() -> bool:
+    """
+    Imports cattrs on first use.
+
+    Returns:
+        bool: True if cattrs is available, False otherwise.
+    """
+    global cattrs_available, Converter
+    try:
+        from cattrs import Converter
+    except ImportError:
+        return False
+
+    cattrs_available = True
+    return True
+
+
+@cache
+def _load_mashumaro() -> bool:
+    """
+    Imports mashumaro on first use.
+
+    Returns:
+        bool: True if mashumaro is available, False otherwise.
+    """
+    global mashumaro_available, DataClassDictMixin
+    try:
+        from mashumaro import DataClassDictMixin
+    except ImportError:
+        return False
+
+    mashumaro_available = True
+    return True
+
+
+@cache
+def _load_msgspec() -> bool:
+    """
+    Imports msgspec on first use.
+
+    Returns:
+        bool: True if msgspec is available, False otherwise.
+    """
+    global msgspec_available, msgspec
+    try:
+        import msgspec
+    except ImportError:
+        return False
+
+    msgspec_available = True
+    return True
+
+
+@cache
+def _load_ijson() -> bool:
+    """
+    Imports ijson on first use.
+
+    Returns:
+        bool: True if ijson is available, False otherwise.
+    """
+    global ijson_available, ijson
+    try:
+        import ijson
+    except ImportError:
+        return False
+
+    ijson_available = True
+    return True
+
+
+@cache
+def _load_dacite() -> bool:
+    """
+    Imports dacite on first use.
+
+    Returns:
+        bool: True if dacite is available, False otherwise.
+    """
+    global dacite_available, from_dict
+    try:
+        from dacite import from_dict
+    except ImportError:
+        return False
+
+    dacite_available = True
+    return True
+
+
+# Ordered names of the supported formats, used in error messages.
+SUPPORTED_FORMAT_NAMES: Tuple[str, ...] = ("json", "yaml", "toml", "ini")
+SUPPORTED_FORMATS: frozenset[str] = frozenset(SUPPORTED_FORMAT_NAMES)
+
+
+@cache
+def _platform_banner() -> str:
+    """
+    Describes the system and Python version for the initialization log message.
+
+    The platform module is imported and queried only once per process. The architecture is derived from the pointer size,
+    as platform.architecture() runs the file command on the interpreter to find it.
+
+    Returns:
+        str: The system, version, architecture and Python version.
+    """
+    from platform import system, version, python_version
+    from struct import calcsize
+
+    return f"{system()} {version()} {calcsize('P') * 8}bit Python {python_version()}"
+
+
+@cache
+def _new_file_mode() -> int:
+    """
+    Returns the permissions a newly created file gets from open(), which depend on the process umask.
+
+    The umask can only be read by setting it, so it is read once per process and restored immediately.
+
+    Returns:
+        int: The permission bits of a new file.
+    """
+    current_umask: int = umask(0)
+    umask(current_umask)
+    return 0o666 & ~current_umask
+
+
+def _fsync_directory(path: Path) -> None:
+    """
+    Flushes a directory entry to disk, so that a file renamed into the directory survives a crash.
+
+    Directories cannot be opened for flushing on Windows, where this does nothing.
 
-try:
-    from toml import load as toml_load, dump as toml_dump
+    Args:
+        path (Path): The directory to flush.
+    """
+    if platform == "win32":
+        return
+    descriptor: int = os_open(path, O_RDONLY | O_DIRECTORY)
+    try:
+        fsync(descriptor)
+    finally:
+        close(descriptor)
+
+
+# Per-thread INI parsers, see _ini_parser.
+_ini_parsers = local()
+
+
+def _ini_parser() -> ConfigParser:
+    """
+    Returns the INI parser of the current thread, creating it on first use and emptying it otherwise.
+
+    All settings managers in a thread share one parser, so no parser is set up per manager and managers used from
+    several threads never share one. The parser is emptied on every call, including its DEFAULT section, which
+    ConfigParser.clear() leaves in place, so nothing parsed from one file can leak into another file or a later save.
+    Interpolation is disabled, so values are stored and returned exactly as given, without the per-value interpolation checks.
+
+    Returns:
+        ConfigParser: The empty INI parser of the current thread.
+    """
+    parser: Optional[ConfigParser] = getattr(_ini_parsers, "parser", None)
+    if parser is None:
+        parser = ConfigParser(allow_no_value=True, interpolation=None)
+        _ini_parsers.parser = parser
+        return parser
+    parser.clear()
+    parser[parser.default_section].clear()
+    return parser
+
+
+# Files at least this large are memory-mapped when read in binary mode.
+_MMAP_THRESHOLD = 256 * 1024
+
+# Parsed settings data, keyed by the format and the digest of the file contents, so that constructing several managers
+# for the same file parses it only once per process. Keying by contents rather than modification time means an entry
+# can never be stale. Each entry is a private copy of the parsed data.
+_parse_cache: Dict[Tuple[str, bytes], Dict[str, Any]] = {}
+
+# Maximum number of parsed files kept in _parse_cache. The oldest entry is evicted first.
+_PARSE_CACHE_SIZE = 32
+
+
+def _cache_parsed(key: Tuple[str, bytes], data: Dict[str, Any]) -> None:
+    """
+    Stores parsed settings data in the process-wide parse cache, evicting the oldest entry when the cache is full.
+
+    Args:
+        key (Tuple[str, bytes]): The format and the digest of the contents of the parsed file.
+        data (Dict[str, Any]): A copy of the parsed data that is not shared with any settings manager.
+    """
+    if len(_parse_cache) >= _PARSE_CACHE_SIZE:
+        _parse_cache.pop(next(iter(_parse_cache)), None)
+    _parse_cache[key] = data
+
+
+# Types that can be shared rather than copied when cloning settings data.
+_ATOMIC_TYPES: frozenset[type] = frozenset({str, int, float, bool, bytes, type(None)})
+
+
+def _fast_clone(obj: Any) -> Any:
+    """
+    Copies plain settings data made of dicts, lists, tuples and atomic values, which is much faster than deepcopy for such data.
+
+    Any other type, including subclasses of the handled containers, is copied with deepcopy.
+
+    Args:
+        obj (Any): The data to copy.
+
+    Returns:
+        Any: A copy of the data that shares no mutable containers with the original.
+    """
+    obj_type = type(obj)
+    if obj_type in _ATOMIC_TYPES:
+        return obj
+    if obj_type is dict:
+        return {key: _fast_clone(value) for key, value in obj.items()}
+    if obj_type is list:
+        return [_fast_clone(value) for value in obj]
+    if obj_type is tuple:
+        return tuple(_fast_clone(value) for value in obj)
+    return deepcopy(obj)
+
+
+@cache
+def _field_names(cls: type) -> Tuple[str, ...]:
+    """
+    Returns the field names of a dataclass type, looked up once per type.
+
+    Args:
+        cls (type): The dataclass type.
+
+    Returns:
+        Tuple[str, ...]: The names of the fields of the dataclass, in definition order.
+    """
+    return tuple(field.name for field in fields(cls))
+
+
+def _dataclass_to_dict(obj: Any) -> Any:
+    """
+    Converts a dataclass instance to a dictionary like dataclasses.asdict, recursing into nested dataclasses, dicts, lists and tuples,
+    including subclasses of them such as OrderedDict, defaultdict and named tuples.
+
+    The field names of each dataclass type are cached, and other values are copied with _fast_clone instead of deepcopy.
+
+    Args:
+        obj (Any): The dataclass instance, or a value found within one.
+
+    Returns:
+        Any: The converted data, sharing no mutable containers with the original.
+    """
+    obj_type = type(obj)
+    if obj_type in _ATOMIC_TYPES:
+        return obj
+    if is_dataclass(obj_type):
+        return {
+            name: _dataclass_to_dict(getattr(obj, name))
+            for name in _field_names(obj_type)
+        }
+    if obj_type is dict:
+        return {
+            _dataclass_to_dict(key): _dataclass_to_dict(value)
+            for key, value in obj.items()
+        }
+    if obj_type is list:
+        return [_dataclass_to_dict(value) for value in obj]
+    if obj_type is tuple:
+        return tuple(_dataclass_to_dict(value) for value in obj)
+    # Subclasses of the containers are rebuilt as their own type, the same way asdict does.
+    if isinstance(obj, tuple) and hasattr(obj, "_fields"):
+        return obj_type(*[_dataclass_to_dict(value) for value in obj])
+    if isinstance(obj, (list, tuple)):
+        return obj_type(_dataclass_to_dict(value) for value in obj)
+    if isinstance(obj, dict):
+        if isinstance(obj, defaultdict):
+            result = obj_type(obj.default_factory)
+            for key, value in obj.items():
+                result[_dataclass_to_dict(key)] = _dataclass_to_dict(value)
+            return result
+        return obj_type(
+            (_dataclass_to_dict(key), _dataclass_to_dict(value))
+            for key, value in obj.items()
+        )
+    return _fast_clone(obj)
+
+
+# Field types that a flat settings dataclass may have, see _flat_fields.
+_FLAT_FIELD_TYPES: frozenset[type] = frozenset({str, int, float, bool})
+
+# Sentinel for fields missing from the data passed to _flat_dataclass_from_dict.
+_MISSING = object()
+
+
+@cache
+def _flat_fields(cls: type) -> Optional[Tuple[Tuple[str, type], ...]]:
+    """
+    Returns the names and types of the fields of a flat dataclass type, looked up once per type.
 
-    toml_available = True
-except ImportError:
-    pass
+    A dataclass is flat when every field is set through __init__ and annotated as str, int, float or bool.
 
+    Args:
+        cls (type): The dataclass type.
 
-SUPPORTED_FORMATS: list[str] = ["json", "yaml", "toml", "ini"]
+    Returns:
+        Optional[Tuple[Tuple[str, type], ...]]: The name and type of each field, or None if the dataclass is not flat.
+    """
+    try:
+        hints: Dict[str, Any] = get_type_hints(cls)
+    except (NameError, TypeError):
+        return None
+    flat_fields: List[Tuple[str, type]] = []
+    for field in fields(cls):
+        field_type = hints.get(field.name)
+        if not field.init or field_type not in _FLAT_FIELD_TYPES:
+            return None
+        flat_fields.append((field.name, field_type))
+    return tuple(flat_fields)
+
+
+def _flat_dataclass_from_dict(
+    cls: type, flat_fields: Tuple[Tuple[str, type], ...], data: Dict[str, Any]
+) -> Optional[Any]:
+    """
+    Constructs a flat dataclass directly from a dictionary, without going through a conversion library.
+
+    The dictionary must hold every field with a value of exactly the annotated type, in which case the conversion
+    libraries would produce the same object. Otherwise, None is returned so the caller can fall back to them.
+
+    Args:
+        cls (type): The flat dataclass type.
+        flat_fields (Tuple[Tuple[str, type], ...]): The fields of the dataclass, as returned by _flat_fields.
+        data (Dict[str, Any]): The dictionary to convert.
+
+    Returns:
+        Optional[Any]: The constructed settings object, or None if the dictionary does not match the fields exactly.
+    """
+    kwargs: Dict[str, Any] = {}
+    for name, field_type in flat_fields:
+        value = data.get(name, _MISSING)
+        if type(value) is not field_type:
+            return None
+        kwargs[name] = value
+    return cls(**kwargs)
+
+
+# Maximum length of string values interned by _intern_tree. Longer values are rarely repeated.
+_INTERN_MAX_LENGTH = 64
+
+
+def _intern_tree(obj: Any) -> Any:
+    """
+    Interns all string keys and short string values in loaded settings data, so repeated keys and values share one object.
+
+    Args:
+        obj (Any): The data to intern.
+
+    Returns:
+        Any: The data with dictionaries and lists rebuilt around the interned strings.
+    """
+    obj_type = type(obj)
+    if obj_type is str:
+        return intern(obj) if len(obj) < _INTERN_MAX_LENGTH else obj
+    if obj_type is dict:
+        return {
+            intern(key) if type(key) is str else key: _intern_tree(value)
+            for key, value in obj.items()
+        }
+    if obj_type is list:
+        return [_intern_tree(value) for value in obj]
+    return obj
+
+
+def _drop_none(obj: Any) -> Any:
+    """
+    Removes the keys whose value is None from nested dictionaries, including dictionaries within lists.
+
+    TOML has no null value. The toml module leaves such keys out when writing, while tomli_w rejects them, so they are
+    removed before writing with tomli_w to keep the output the same.
+
+    Args:
+        obj (Any): The data to clean.
+
+    Returns:
+        Any: The data with dictionaries and lists rebuilt without None values; other values are returned as is.
+    """
+    if isinstance(obj, Mapping):
+        return {
+            key: _drop_none(value) for key, value in obj.items() if value is not None
+        }
+    if isinstance(obj, list):
+        return [_drop_none(value) for value in obj]
+    return obj
+
+
+_yaml_c_warning_issued = False
 
 
 class SettingsManagerBase(ABC, ChangeDetectingDict):
+    # Maps file extensions to the format used when no format is specified.
+    _EXT_TO_FORMAT: ClassVar[Dict[str, str]] = {
+        ".json": "json",
+        ".yaml": "yaml",
+        ".yml": "yaml",
+        ".toml": "toml",
+        ".ini": "ini",
+    }
+
     def __init__(
         self,
         path: Optional[str] = None,
@@ -89,6 +621,11 @@ class SettingsManagerBase(ABC, ChangeDetectingDict):
         logger: Optional[Logger] = None,
         auto_sanitize: bool = False,
         format: Optional[str] = None,
+        fsync: bool = False,
+        buffer_size: int = -1,
+        json_indent: Optional[int] = 4,
+        use_orjson: bool = False,
+        use_msgspec: bool = False,
     ) -> None:
         if not path and not (read_path or write_path):
             raise InvalidPathError(
@@ -101,9 +638,10 @@ class SettingsManagerBase(ABC, ChangeDetectingDict):
 
         self.logger: Optional[Logger] = logger
 
-        if self.logger:
+        if self.logger and self.logger.isEnabledFor(INFO):
             self.logger.info(
-                msg=f"\n========== Initializing SettingsManager ==========\nSystem info: {system()} {version()} {architecture()[0]} Python {python_version()}\n"
+                "\n========== Initializing SettingsManager ==========\nSystem info: %s\n",
+                _platform_banner(),
             )
 
         if path:
@@ -113,48 +651,100 @@ class SettingsManagerBase(ABC, ChangeDetectingDict):
             self._read_path = Path(read_path)
             self._write_path = Path(write_path)
 
+        # Cached once, as the suffixes are needed to determine the format. Lowercased so extensions match case-insensitively.
+        self._read_suffix: str = self._read_path.suffix.lower()
+        self._write_suffix: str = self._write_path.suffix.lower()
+
         if self.logger:
             self.logger.info(
-                msg=f"Read path: {self._read_path}. Write path: {self._write_path}."
+                "Read path: %s. Write path: %s.", self._read_path, self._write_path
             )
 
         self._auto_sanitize: bool = auto_sanitize
         self._autosave_on_change: bool = autosave_on_change
-
-        self._default_settings_as_dict: Dict[str, Any] = self._to_dict(
-            data=default_settings
-        )
+        # The atomic replace guarantees other processes only ever see the old or the new version of the file. Surviving a
+        # crash or power loss is opt-in: without fsync, some filesystems may leave an empty or truncated file behind, as the
+        # rename can reach the disk before the data. With fsync, the data is flushed before the replace and the directory after it.
+        self._fsync: bool = fsync
+        # Buffer size of the file opened by peek(), passed to open(). The default of -1 uses Python's default buffer size;
+        # a larger buffer reduces the number of reads when peeking into large files, which are read incrementally there.
+        # load() reads or memory-maps the whole file at once, so the buffer size does not affect it.
+        self._buffer_size: int = buffer_size
+        # Indentation of saved JSON files. None writes compact JSON, which is the fastest to produce, and 0 writes each item on its own line without indentation.
+        self._json_indent: Optional[int] = json_indent
+
+        # The dictionary form of the defaults is only built when first needed, see _default_settings_as_dict.
         self._default_settings: Any = default_settings
 
         if format:
             if self.logger:
-                self.logger.info(msg=f"User specified format: {format}.")
+                self.logger.info("User specified format: %s.", format)
             self._format: str = format
         else:
             self._format = self._get_format()
             if self.logger:
-                self.logger.info(
-                    msg=f"Automatically determined format: {self._format}."
-                )
+                self.logger.info("Automatically determined format: %s.", self._format)
 
         if self._format not in SUPPORTED_FORMATS:
             if self.logger:
                 self.logger.error(
-                    msg=f"Format {self._format} is not in the list of supported formats: {', '.join(SUPPORTED_FORMATS)}."
+                    msg=f"Format {self._format} is not in the list of supported formats: {', '.join(SUPPORTED_FORMAT_NAMES)}."
                 )
             raise UnsupportedFormatError(
-                f"Format {self._format} is not in the list of supported formats: {', '.join(SUPPORTED_FORMATS)}."
+                f"Format {self._format} is not in the list of supported formats: {', '.join(SUPPORTED_FORMAT_NAMES)}."
             )
 
-        if self._format == "yaml" and not yaml_available:
+        # Resolve the format-specific read and write methods once, rather than on every save and load.
+        # They are called directly, without an intermediate dispatch method.
+        self._write_fn: Callable[..., None] = getattr(self, f"_write_as_{self._format}")
+        self._read_fn: Callable[..., Dict[str, Any]] = getattr(
+            self, f"_read_as_{self._format}"
+        )
+
+        if self._format == "yaml" and not _load_yaml_module():
             if self.logger:
                 self.logger.error(msg="The yaml module is not available.")
             raise MissingDependencyError("The yaml module is not available.")
 
-        if self._format == "toml" and not toml_available:
+        if self._format == "yaml" and not yaml_c_available:
+            self._warn_yaml_c_unavailable()
+
+        # orjson is opt-in, as it does not behave like the json module for all data: it writes NaN and infinity as null.
+        # Integers wider than 64 bits, and files containing NaN or infinity, which orjson rejects, go through the json module instead.
+        self._use_orjson: bool = False
+        if self._format == "json" and use_orjson:
+            if not _load_orjson():
+                if self.logger:
+                    self.logger.error(msg="The orjson module is not available.")
+                raise MissingDependencyError("The orjson module is not available.")
+            self._use_orjson = True
+
+        # msgspec is opt-in, as it coerces values differently than cattrs and dacite. It is only used by
+        # SettingsManagerAsDataclass, to convert dictionaries to settings objects.
+        if use_msgspec and not _load_msgspec():
             if self.logger:
-                self.logger.error(msg="The toml module is not available.")
-            raise MissingDependencyError("The toml module is not available.")
+                self.logger.error(msg="The msgspec module is not available.")
+            raise MissingDependencyError("The msgspec module is not available.")
+        self._use_msgspec: bool = use_msgspec
+
+        if self._format == "toml" and not _load_toml_module():
+            if self.logger:
+                self.logger.error(
+                    msg="The toml module, or tomllib (or tomli) and tomli_w, are not available."
+                )
+            raise MissingDependencyError(
+                "The toml module, or tomllib (or tomli) and tomli_w, are not available."
+            )
+
+        # tomllib only accepts files opened in binary mode, and both JSON parsers accept bytes directly.
+        # Without tomllib, TOML is read with the toml module, which needs text mode.
+        self._read_mode: str = (
+            "rb"
+            if self._format == "json" or (self._format == "toml" and tomllib_available)
+            else "r"
+        )
+        # Settings are always written as UTF-8, so text-mode reads use the same encoding.
+        self._read_encoding: Optional[str] = None if "b" in self._read_mode else "utf-8"
 
         if autosave_on_exit:
             if self.logger:
@@ -163,46 +753,110 @@ class SettingsManagerBase(ABC, ChangeDetectingDict):
                 )
             register(self.save)
 
+        # Digest of the contents last written by save() or read by load(), used to skip rewriting unchanged settings.
+        self._last_saved_digest: Optional[bytes] = None
+        self._last_saved_stat: Optional[Tuple[int, int]] = None
+
+        # Whether the settings may differ from the file since the last save or load. Parts of the settings that are
+        # handed out may be changed without the manager noticing, so the flag is also set whenever that happens.
+        self._dirty: bool = True
+
         super().__init__(parent=self)
         self._first_time_load()
 
         if self.logger:
-            self.logger.info(msg=f"Auto save on changes? {self._autosave_on_change}.")
-            self.logger.info(msg=f"Sanitize settings? {self._auto_sanitize}.")
+            self.logger.info("Auto save on changes? %s.", self._autosave_on_change)
+            self.logger.info("Sanitize settings? %s.", self._auto_sanitize)
             self.logger.info(
-                msg=f"SettingsManager initialized with format {self._format}!"
+                "SettingsManager initialized with format %s!", self._format
             )
 
-    @property
-    def settings(self) -> None:
-        pass
+    def _warn_yaml_c_unavailable(self) -> None:
+        """
+        Warns once per process that PyYAML was built without libyaml and the slower pure-Python loader is used.
+        """
+        global _yaml_c_warning_issued
+        if _yaml_c_warning_issued or not self.logger:
+            return
+        _yaml_c_warning_issued = True
+        self.logger.warning(
+            msg="libyaml is not available; falling back to the pure-Python YAML loader and dumper. Install a PyYAML build with libyaml support for faster YAML parsing."
+        )
 
-    @settings.getter
-    def settings(self) -> Dict[str, Any]:
+    def __getitem__(self, key: str) -> Any:
+        value = self._store[key]
+        # Containers can be changed in place after being handed out, so the settings can no longer be assumed unchanged.
+        if type(value) not in _ATOMIC_TYPES:
+            self._dirty = True
+        return value
+
+    def mark_dirty(self) -> None:
+        """
+        Marks the settings as changed, so the next save serializes them even if no change was noticed.
+
+        Changes made through the settings manager and its change-detecting containers are noticed automatically. Call this
+        after changing the settings in a way the manager cannot see, e.g. through a reference kept from before the last save.
+        """
+        self._dirty = True
+
+    @property
+    def settings(self) -> Any:
+        # The returned object may share mutable values with the settings data.
+        self._dirty = True
         return self._from_dict(data=self._store)
 
     @settings.setter
     def settings(self, value: Any) -> None:
+        self._dirty = True
         self._store = self._to_dict(data=value)
 
+    @cached_property
+    def _default_settings_as_dict(self) -> Dict[str, Any]:
+        """
+        The default settings converted to a dictionary.
+
+        This is only needed for sanitization and when no settings file exists yet, so it is computed on first access.
+        """
+        return self._to_dict(data=self._default_settings)
+
+    def invalidate_defaults(self) -> None:
+        """
+        Discards the cached dictionary form of the default settings, so it is converted again when next needed.
+
+        The default settings are converted once and reused afterwards. Call this after changing the default settings object in place.
+        """
+        self.__dict__.pop("_default_settings_as_dict", None)
+        # Sanitizing against the changed defaults may change the settings.
+        self._dirty = True
+
     @toggle_autosave_off
     def _first_time_load(self) -> None:
         """
         Loads the settings from the file if it exists, otherwise applies default settings and saves them to the file.
+
+        Raises:
+            LoadError: If the settings file exists but there is an error while reading it.
         """
-        if self._read_path.exists():
+        # Opening the file directly tells whether it exists, without a separate stat call beforehand.
+        try:
+            self._load_from_file()
+        except FileNotFoundError:
             if self.logger:
                 self.logger.info(
-                    msg=f"Settings file {self._read_path} exists; loading settings."
+                    "Settings file %s does not exist; applying default settings and saving.",
+                    self._read_path,
                 )
-            self.load()
+            self._store = _fast_clone(self._default_settings_as_dict)
+            self.save()  # Save the default settings to the file
+        except IOError as e:
+            if self.logger:
+                self.logger.exception(msg="Error while reading settings from file.")
+            raise LoadError("Error while reading settings from file.") from e
         else:
             if self.logger:
                 self.logger.info(
-                    msg=f"Settings file {self._read_path} does not exist; applying default settings and saving."
+                    "Settings file %s exists; loaded settings.", self._read_path
                 )
-            self._store = deepcopy(x=self._default_settings_as_dict)
-            self.save()  # Save the default settings to the file
 
     @abstractmethod
     def _to_dict(self, data: Any) -> Dict[str, Any]:
@@ -241,10 +895,15 @@ class SettingsManagerBase(ABC, ChangeDetectingDict):
         Save the settings data to a file.
 
         If the auto_sanitize flag is set to True, the settings will be sanitized before saving.
+        The settings are serialized in memory first, and the file is left untouched if the result is identical to what this instance last wrote or loaded and the file has not changed since.
+        Otherwise, the file is replaced atomically, so it is never seen partially written. With fsync enabled, the new file also survives a crash or power loss.
 
         Raises:
             SaveError: If there is an error while writing the settings to the file.
         """
+        # Nothing has changed since the last save or load, and the file is still the one written or read then.
+        if not self._dirty and self._file_unchanged_since_save():
+            return
         if self._auto_sanitize:
             self.sanitize_settings()
         if self._format == "ini" and not self.valid_ini_format(data=self._store):
@@ -258,124 +917,369 @@ class SettingsManagerBase(ABC, ChangeDetectingDict):
         # Reference assignment instead of deep copy to avoid unnecessary copying, since we're not modifying the data, and the scope is local to this method.
         # We could also entirely avoid this by changing each save method to directly use the internal data, but the flexibility of the current design is nice.
         settings_data: Dict[str, Any] = self._store
+        payload: bytes
+        if self._format == "json":
+            # The JSON writer produces encoded bytes, so it is given a binary buffer and nothing needs encoding.
+            binary_buffer: BytesIO = BytesIO()
+            self._write_fn(data=settings_data, file=binary_buffer)
+            payload = binary_buffer.getvalue()
+        else:
+            buffer: StringIO = StringIO()
+            self._write_fn(data=settings_data, file=buffer)
+            payload = buffer.getvalue().encode("utf-8")
+        digest: bytes = blake2b(payload).digest()
+        if digest == self._last_saved_digest and self._file_unchanged_since_save():
+            self._dirty = False
+            return
         try:
-            with open(file=self._write_path, mode="w") as file:
-                self._write(data=settings_data, file=file)
+            self._replace_file(payload=payload)
+            self._last_saved_stat = self._stat_write_path()
         except IOError as e:
             if self.logger:
                 self.logger.exception(msg="Error while writing settings to file.")
             raise SaveError("Error while writing settings to file.") from e
+        self._last_saved_digest = digest
+        self._dirty = False
 
-    def _write(self, data: Dict[str, Any], file: IO) -> None:
+    def _replace_file(self, payload: bytes) -> None:
         """
-        Dispatches the write operation to the correct method based on the format attribute.
+        Writes the payload to a temporary file next to the settings file in one call, then atomically replaces the settings file with it.
+
+        Other readers therefore never see a partially written settings file, and with fsync enabled, the data and the rename
+        are flushed to disk, so a crash cannot leave a truncated file behind either. The temporary file gets a unique name, so
+        managers and threads saving the same file never write to each other's temporary file. A symlinked settings path is
+        resolved first, so the file it points to is replaced rather than the link, and the permissions of the existing file are kept.
 
         Args:
-            data (Dict[str, Any]): The settings data to write to the file.
-            file (IO): The file object to write the settings to.
+            payload (bytes): The serialized settings data.
 
         Raises:
-            UnsupportedFormatError: If the format is not in the list of supported formats.
+            IOError: If the temporary file cannot be written or the settings file cannot be replaced.
         """
-        format_to_function: Dict[str, Callable] = {
-            "json": self._write_as_json,
-            "yaml": self._write_as_yaml,
-            "toml": self._write_as_toml,
-            "ini": self._write_as_ini,
-        }
-        if self._format in format_to_function:
-            write_function: Callable = format_to_function[self._format]
-            write_function(data=data, file=file)
-        else:
-            if self.logger:
-                self.logger.error(
-                    msg=f"Format {self._format} is not in the list of supported formats: {', '.join(SUPPORTED_FORMATS)}."
-                )
-            raise UnsupportedFormatError(
-                f"Format {self._format} is not in the list of supported formats: {', '.join(SUPPORTED_FORMATS)}."
-            )
+        target: Path = self._write_path.resolve()
+        try:
+            mode: int = target.stat().st_mode & 0o7777
+        except FileNotFoundError:
+            mode = _new_file_mode()
+        descriptor, temp_name = mkstemp(
+            dir=target.parent, prefix=f".{target.name}.", suffix=".tmp"
+        )
+        try:
+            with fdopen(descriptor, "wb") as file:
+                file.write(payload)
+                if self._fsync:
+                    file.flush()
+                    fsync(file.fileno())
+            # mkstemp creates the file readable by the owner only.
+            chmod(temp_name, mode)
+            replace(temp_name, target)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+        if self._fsync:
+            _fsync_directory(path=target.parent)
+
+    def _stat_write_path(self) -> Optional[Tuple[int, int]]:
+        """
+        Returns the modification time and size of the file at the write path, or None if it does not exist.
+        """
+        try:
+            stat_result = self._write_path.stat()
+        except OSError:
+            return None
+        return stat_result.st_mtime_ns, stat_result.st_size
+
+    def _file_unchanged_since_save(self) -> bool:
+        """
+        Checks whether the file at the write path still matches the one written by the last save.
+        """
+        current_stat = self._stat_write_path()
+        return current_stat is not None and current_stat == self._last_saved_stat
 
     def _write_as_json(self, data: Dict[str, Any], file: IO) -> None:
-        dump(obj=data, fp=file, indent=4)
+        """
+        Writes the settings data as JSON. Unlike the other writers, it is given a binary file and writes UTF-8 encoded bytes.
+        """
+        file.write(self._dump_json(data=data))
+
+    def _dump_json(self, data: Dict[str, Any]) -> bytes:
+        """
+        Serializes the settings data to JSON-encoded bytes, using orjson if enabled.
+
+        Data orjson cannot serialize, such as integers wider than 64 bits, is serialized with the json module instead.
+        orjson writes NaN and infinity as null, while the json module writes them as NaN and Infinity.
+
+        Args:
+            data (Dict[str, Any]): The settings data to serialize.
+
+        Returns:
+            bytes: The UTF-8 encoded JSON document.
+        """
+        if self._use_orjson:
+            # orjson only supports indenting with two spaces, so any indentation is written as two spaces. That includes
+            # an indentation of 0, which the json module writes as newlines without indentation, so that both write
+            # one item per line. Non-string keys are converted like the json module does.
+            option: int = orjson.OPT_NON_STR_KEYS
+            if self._json_indent is not None:
+                option |= orjson.OPT_INDENT_2
+            try:
+                return orjson.dumps(data, option=option)
+            except orjson.JSONEncodeError:
+                pass
+        return dumps(obj=data, indent=self._json_indent).encode("utf-8")
 
     def _write_as_yaml(self, data: Dict[str, Any], file: IO) -> None:
-        safe_dump(data, file)
+        yaml_dump(data, file, Dumper=YamlDumper)
 
     def _write_as_toml(self, data: Dict[str, Any], file: IO) -> None:
-        toml_dump(data, file)
+        if tomli_w_available:
+            file.write(tomli_w.dumps(_drop_none(data)))
+        else:
+            toml_dump(data, file)
 
     def _write_as_ini(self, data: Dict[str, Any], file: IO) -> None:
-        config = ConfigParser(allow_no_value=True)
-        for section, settings in data.items():
-            config[section] = settings
-        config.write(fp=file)
+        parser: ConfigParser = _ini_parser()
+        parser.read_dict(dictionary=data)
+        parser.write(fp=file)
 
     def load(self) -> None:
         """
         Load the settings from the specified file into the internal data attribute. autosave_on_change is not triggered by this method.
 
         If the auto_sanitize flag is set to True, the settings will be sanitized after reading.
+        If a file with the same contents was already parsed in this process, a copy of that data is used instead of parsing it again.
 
         Raises:
             LoadError: If there is an error while reading the settings from the file.
         """
         try:
-            with open(file=self._read_path, mode="r") as f:
-                self._store: Dict[str, Any] = self._read(file=f)
-                if self._auto_sanitize:
-                    self.sanitize_settings()
+            self._load_from_file()
         except IOError as e:
             if self.logger:
                 self.logger.exception(msg="Error while reading settings from file.")
             raise LoadError("Error while reading settings from file.") from e
 
-    def _read(self, file: IO) -> Dict[str, Any]:
+    def _load_from_file(self) -> None:
+        """
+        Reads the settings file into the internal data attribute, sanitizing it if auto_sanitize is enabled.
+
+        Raises:
+            IOError: If the settings file cannot be opened or read, e.g. FileNotFoundError if it does not exist.
+        """
+        with open(
+            file=self._read_path, mode=self._read_mode, encoding=self._read_encoding
+        ) as f:
+            stat_result = fstat(f.fileno())
+            digest: bytes
+            if "b" in self._read_mode and stat_result.st_size >= _MMAP_THRESHOLD:
+                # Large files are memory-mapped, so the parser reads the page cache directly.
+                with mmap(f.fileno(), 0, access=ACCESS_READ) as mapped:
+                    digest = blake2b(mapped).digest()
+                    self._store: Dict[str, Any] = self._parse_or_reuse(digest=digest, file=mapped)  # type: ignore[arg-type]
+            else:
+                contents: Union[str, bytes] = f.read()
+                if isinstance(contents, bytes):
+                    digest = blake2b(contents).digest()
+                    self._store = self._parse_or_reuse(
+                        digest=digest, file=BytesIO(contents)
+                    )
+                else:
+                    digest = blake2b(contents.encode("utf-8")).digest()
+                    self._store = self._parse_or_reuse(
+                        digest=digest, file=StringIO(contents)
+                    )
+            # When the file is also the one saved to, its digest is recorded so that saving the loaded settings unchanged skips the write.
+            if self._read_path == self._write_path:
+                self._last_saved_digest = digest
+                self._last_saved_stat = (
+                    stat_result.st_mtime_ns,
+                    stat_result.st_size,
+                )
+                # Sanitizing below marks the settings as changed again if it alters them.
+                self._dirty = False
+            if self._auto_sanitize:
+                self.sanitize_settings()
+
+    def _parse_or_reuse(self, digest: bytes, file: IO) -> Dict[str, Any]:
         """
-        Dispatches the read operation to the correct method based on the format attribute.
+        Parses the settings file, or copies the data parsed earlier in this process from a file with the same contents.
 
         Args:
-            file (IO): The file object to read the settings from.
+            digest (bytes): The digest of the file contents.
+            file (IO): The file object to parse the settings from if they are not cached.
 
         Returns:
-            Dict[str, Any]: The settings data read from the file.
-
-        Raises:
-            UnsupportedFormatError: If the format is not in the list of supported formats.
+            Dict[str, Any]: The settings data, not shared with the cache or any other settings manager.
         """
-        format_to_function: Dict[str, Callable] = {
-            "json": self._read_as_json,
-            "yaml": self._read_as_yaml,
-            "toml": self._read_as_toml,
-            "ini": self._read_as_ini,
-        }
-        if self._format in format_to_function:
-            read_function: Callable = format_to_function[self._format]
-            return read_function(file=file)
-        else:
-            raise UnsupportedFormatError(
-                f"Format {self._format} is not in the list of supported formats: {', '.join(SUPPORTED_FORMATS)}."
-            )
+        key: Tuple[str, bytes] = (self._format, digest)
+        cached: Optional[Dict[str, Any]] = _parse_cache.get(key)
+        if cached is not None:
+            return _fast_clone(cached)
+        data: Dict[str, Any] = self._read_fn(file=file)
+        # INI keys are short and section-scoped, so interning them gains little.
+        if self._format != "ini":
+            data = _intern_tree(data)
+        _cache_parsed(key=key, data=_fast_clone(data))
+        return data
 
     def _read_as_json(self, file: IO) -> Dict[str, Any]:
+        if self._use_orjson:
+            try:
+                if isinstance(file, mmap):
+                    with memoryview(file) as view:
+                        return orjson.loads(view)
+                return orjson.loads(file.read())
+            except orjson.JSONDecodeError:
+                # The json module also accepts NaN and infinity, and raises the error for invalid documents.
+                file.seek(0)
         return load(fp=file)
 
     def _read_as_yaml(self, file: IO) -> Dict[str, Any]:
-        return safe_load(file)
+        return yaml_load(file, Loader=YamlLoader)
 
     def _read_as_toml(self, file: IO) -> Dict[str, Any]:
+        if tomllib_available:
+            return tomllib.load(file)
         return toml_load(file)
 
     def _read_as_ini(self, file: IO) -> Dict[str, Any]:
-        config = ConfigParser(allow_no_value=True)
-        config.read_file(f=file)
+        parser: ConfigParser = _ini_parser()
+        parser.read_file(f=file)
+        return self._ini_sections_as_dict(parser=parser)
+
+    def _ini_sections_as_dict(
+        self, parser: ConfigParser
+    ) -> Dict[str, Dict[str, Optional[str]]]:
+        """
+        Copies the sections parsed by the INI parser into plain dictionaries.
+
+        Interpolation is disabled, so the values are copied straight from the parser's section mapping instead of
+        being looked up one by one through items(). Values from the DEFAULT section are merged in, as items() does.
+        """
+        defaults: Mapping[str, Optional[str]] = parser.defaults()
+        sections: Dict[str, Dict[str, Optional[str]]] = parser._sections  # type: ignore[attr-defined]
+        if not defaults:
+            return {section: dict(options) for section, options in sections.items()}
         return {
-            section: dict(config.items(section=section))
-            for section in config.sections()
+            section: {**defaults, **options} for section, options in sections.items()
+        }
+
+    def peek(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Reads the given top-level keys from the settings file without loading it into the settings manager.
+
+        Only as much of the file as needed is parsed where the format allows it, which makes this cheap for
+        scanning many candidate files for e.g. a version field. JSON files are read incrementally if ijson is
+        installed, YAML files stop parsing once all keys are found, and INI files only parse the requested sections
+        and the DEFAULT section, whose values are merged in as load() does. TOML files are always parsed in full.
+        If the partial parse fails, the whole file is parsed instead.
+
+        The result matches what load() would give for those keys, except that for a key occurring more than once at the
+        top level of a JSON or YAML file, peek returns the first value while load() keeps the last one. A file that is
+        empty, or whose document is not a mapping, has none of the keys.
+
+        Args:
+            keys (List[str]): The top-level keys to read. For the INI format, these are section names.
+
+        Returns:
+            Dict[str, Any]: The requested keys that exist in the file, with their values.
+
+        Raises:
+            LoadError: If there is an error while reading the settings from the file.
+        """
+        wanted: Set[str] = set(keys)
+        try:
+            with open(
+                file=self._read_path,
+                mode=self._read_mode,
+                buffering=self._buffer_size,
+                encoding=self._read_encoding,
+            ) as f:
+                try:
+                    if self._format == "json" and _load_ijson():
+                        return self._peek_as_json(file=f, keys=wanted)
+                    if self._format == "yaml":
+                        return self._peek_as_yaml(file=f, keys=wanted)
+                    if self._format == "ini":
+                        return self._peek_as_ini(file=f, keys=wanted)
+                except (ValueError, ConfigParserError):
+                    if self.logger:
+                        self.logger.warning(
+                            msg="Partial parse of the settings file failed; parsing the whole file."
+                        )
+                    f.seek(0)
+                data: Any = self._read_fn(file=f)
+                if not isinstance(data, dict):
+                    return {}
+                return {key: data[key] for key in wanted if key in data}
+        except IOError as e:
+            if self.logger:
+                self.logger.exception(msg="Error while reading settings from file.")
+            raise LoadError("Error while reading settings from file.") from e
+
+    def _peek_as_json(self, file: IO, keys: Set[str]) -> Dict[str, Any]:
+        found: Dict[str, Any] = {}
+        try:
+            for key, value in ijson.kvitems(file, "", use_float=True):
+                if key in keys:
+                    found[key] = value
+                    if len(found) == len(keys):
+                        break
+        except ijson.JSONError as e:
+            raise ValueError("Error while parsing the JSON document.") from e
+        return found
+
+    def _peek_as_yaml(self, file: IO, keys: Set[str]) -> Dict[str, Any]:
+        # The libyaml-backed loader does not expose node-level parsing, so the pure-Python loader is used
+        # to compose the top-level mapping one entry at a time.
+        from yaml import SafeLoader, YAMLError
+        from yaml.events import MappingStartEvent, MappingEndEvent
+
+        found: Dict[str, Any] = {}
+        loader = SafeLoader(file)
+        try:
+            loader.get_event()  # StreamStartEvent
+            loader.get_event()  # DocumentStartEvent
+            if not loader.check_event(MappingStartEvent):
+                raise ValueError("The YAML document is not a mapping.")
+            loader.get_event()
+            while len(found) < len(keys) and not loader.check_event(MappingEndEvent):
+                # The stubs require an index, but PyYAML itself composes top-level nodes with None.
+                key = loader.construct_object(
+                    loader.compose_node(None, None)  # type: ignore[arg-type]
+                )
+                value_node = loader.compose_node(None, None)  # type: ignore[arg-type]
+                if key in keys:
+                    found[key] = loader.construct_object(value_node, deep=True)
+        except YAMLError as e:
+            raise ValueError("Error while parsing the YAML document.") from e
+        finally:
+            loader.dispose()
+        return found
+
+    def _peek_as_ini(self, file: IO, keys: Set[str]) -> Dict[str, Any]:
+        # Only the lines of the requested sections and of the DEFAULT section are parsed. The DEFAULT section may come
+        # after the requested sections, so the whole file is scanned for it, which is cheap compared to parsing.
+        parser: ConfigParser = _ini_parser()
+        wanted: Set[str] = set(keys) | {parser.default_section}
+        lines: List[str] = []
+        keep: bool = True
+        for line in file:
+            match = parser.SECTCRE.match(line)
+            if match:
+                keep = match.group("header") in wanted
+            if keep:
+                lines.append(line)
+        parser.read_string(string="".join(lines))
+        return {
+            section: options
+            for section, options in self._ini_sections_as_dict(parser=parser).items()
+            if section in keys
         }
 
     def _get_format(self) -> str:
         """
-        Determines the format of the settings file based on the file extension of the read path.
+        Determines the format of the settings file based on the file extension of the read path, ignoring case.
 
         Returns:
             str: The format of the settings file.
@@ -384,22 +1288,16 @@ class SettingsManagerBase(ABC, ChangeDetectingDict):
             UnsupportedFormatError: If the file extensions of the read and write paths are different and no format is specified.
             UnsupportedFormatError: If the file extension of the read path is not supported.
         """
-        if self._read_path.suffix != self._write_path.suffix:
+        if self._read_suffix != self._write_suffix:
             raise UnsupportedFormatError(
                 "Read and write paths must have the same file extension when not specifying a format."
             )
-        extension_to_format: Dict[str, str] = {
-            ".json": "json",
-            ".yaml": "yaml",
-            ".yml": "yaml",
-            ".toml": "toml",
-            ".ini": "ini",
-        }
-        if self._read_path.suffix in extension_to_format:
-            return extension_to_format[self._read_path.suffix]
+        format: Optional[str] = self._EXT_TO_FORMAT.get(self._read_suffix)
+        if format:
+            return format
         else:
             raise UnsupportedFormatError(
-                f"Trying to determine format from file extension, got {self._read_path} but only {', '.join(SUPPORTED_FORMATS)} are supported."
+                f"Trying to determine format from file extension, got {self._read_path} but only {', '.join(SUPPORTED_FORMAT_NAMES)} are supported."
             )
 
     def sanitize_settings(self) -> None:
@@ -407,86 +1305,66 @@ class SettingsManagerBase(ABC, ChangeDetectingDict):
         Sanitizes the settings data by applying the default settings and removing any invalid or unnecessary values.
 
         The sanitization process is directly applied to the internal data attribute.
+        Without any default settings there is nothing to sanitize against, so the settings are left unchanged.
 
         Raises:
             SanitizationError: If an error occurs while sanitizing the settings.
 
         """
+        default_settings: Dict[str, Any] = self._default_settings_as_dict
+        if not default_settings:
+            return
 
         try:
-            keys_to_remove, keys_to_add = self._sanitize_settings(
-                settings=self._store,
-                default_settings=self._default_settings_as_dict,
-                dict_path="",
-            )
-
-            for key in keys_to_remove:
-                self._remove_key(key=key)
-
-            for key, value in keys_to_add.items():
-                self._add_key(key=key, value=value)
+            if self._sanitize_settings(
+                settings=self._store, default_settings=default_settings
+            ):
+                self._dirty = True
         except SanitizationError as e:
             if self.logger:
                 self.logger.exception(msg="Error while sanitizing settings.")
             raise e
 
     def _sanitize_settings(
-        self, settings: Dict[str, Any], default_settings: Dict[str, Any], dict_path: str
-    ) -> Tuple[List[str], Dict[str, Any]]:
-
-        keys_to_remove: List[str] = []
-        keys_to_add: Dict[str, Any] = {}
-
-        for key in settings:
-            current_path: str = f"{dict_path}.{key}" if dict_path else key
-            if key not in default_settings:
-                keys_to_remove.append(current_path)
-            elif isinstance(settings[key], dict) and isinstance(
-                default_settings[key], dict
-            ):
-                nested_keys_to_remove, nested_keys_to_add = self._sanitize_settings(
-                    settings=settings[key],
-                    default_settings=default_settings[key],
-                    dict_path=current_path,
-                )
-                keys_to_remove.extend(nested_keys_to_remove)
-                keys_to_add.update(nested_keys_to_add)
-            # Add more conditions here if needed, e.g., for lists of dicts
-
-        for key in default_settings:
-            if key not in settings:
-                keys_to_add[f"{dict_path}.{key}" if dict_path else key] = (
-                    default_settings[key]
-                )
-
-        return keys_to_remove, keys_to_add
-
-    def _remove_key(self, key: str) -> None:
-        """
-        Removes the key from the settings data.
-
-        Args:
-            key (str): The key to remove from the settings data.
+        self, settings: Dict[str, Any], default_settings: Dict[str, Any]
+    ) -> bool:
         """
-        keys: List[str] = key.split(sep=".")
-        current_dict: Dict[str, Any] = self._store
-        for key in keys[:-1]:
-            current_dict = current_dict[key]
-        del current_dict[keys[-1]]
+        Walks the settings and default settings side by side and makes their keys match, applying each change as it is found.
 
-    def _add_key(self, key: str, value: Any) -> None:
-        """
-        Adds the key with the specified value to the settings data.
+        The walk is iterative and visits each nested dictionary once. Missing values are copied from the defaults,
+        so later changes to the settings never alter the defaults.
 
         Args:
-            key (str): The key to add to the settings data.
-            value (Any): The value to associate with the key.
+            settings (Dict[str, Any]): The settings data to sanitize.
+            default_settings (Dict[str, Any]): The default settings to sanitize against.
+
+        Returns:
+            bool: True if any key was removed or added, False otherwise.
         """
-        keys: List[str] = key.split(sep=".")
-        current_dict: Dict[str, Any] = self._store
-        for key in keys[:-1]:
-            current_dict = current_dict[key]
-        current_dict[keys[-1]] = value
+        changed: bool = False
+        pending: Deque[Tuple[Dict[str, Any], Dict[str, Any]]] = deque(
+            [(settings, default_settings)]
+        )
+        while pending:
+            current, defaults = pending.popleft()
+            current_keys = current.keys()
+            default_keys = defaults.keys()
+            # Set operations on the key views find the differences in C rather than with per-key checks.
+            # They produce new sets, so the dictionary can be changed while iterating over them.
+            common_keys = current_keys & default_keys
+            stale_keys = current_keys - default_keys
+            missing_keys = default_keys - current_keys
+            if stale_keys or missing_keys:
+                changed = True
+                for key in stale_keys:
+                    del current[key]
+                for key in missing_keys:
+                    current[key] = _fast_clone(defaults[key])
+            for key in common_keys:
+                if isinstance(current[key], dict) and isinstance(defaults[key], dict):
+                    pending.append((current[key], defaults[key]))
+                # Add more conditions here if needed, e.g., for lists of dicts
+        return changed
 
     @staticmethod
     def valid_ini_format(data: Dict[str, Any]) -> bool:
@@ -499,13 +1377,21 @@ class SettingsManagerBase(ABC, ChangeDetectingDict):
         Returns:
             bool: True if all top-level keys have nested dictionaries as values, False otherwise.
         """
-        for _, settings in data.items():
-            if not isinstance(settings, dict):
-                return False
-        return True
+        return all(isinstance(settings, dict) for settings in data.values())
 
 
 class SettingsManagerAsDict(SettingsManagerBase):
+    # Dictionary settings are stored as is, so the settings property skips the conversion methods.
+    @property
+    def settings(self) -> Dict[str, Any]:
+        self._dirty = True
+        return self._store
+
+    @settings.setter
+    def settings(self, value: Dict[str, Any]) -> None:
+        self._dirty = True
+        self._store = value
+
     def _to_dict(self, data: Dict[str, Any]) -> Dict[str, Any]:
         return data
 
@@ -519,6 +1405,16 @@ class SettingsManagerAsDataclass(SettingsManagerBase):
 
     This class provides methods to convert settings objects to dictionaries and vice versa.
 
+    Dictionaries are converted back to settings objects using cattrs when available, falling back to dacite otherwise.
+    Flat dataclasses, whose fields are all str, int, float or bool, are constructed directly when the dictionary matches their fields exactly.
+
+    Settings dataclasses may opt in to mashumaro by inheriting from `mashumaro.DataClassDictMixin`, in which case
+    the conversion methods generated by mashumaro are used in both directions instead.
+
+    Passing use_msgspec=True converts dictionaries with msgspec instead of cattrs or dacite, which is faster for nested
+    dataclasses. msgspec coerces strings to the field types by parsing them, so e.g. "false" becomes False for a bool
+    field, where cattrs would give True.
+
     Attributes:
         _default_settings: The default settings object.
 
@@ -540,8 +1436,10 @@ class SettingsManagerAsDataclass(SettingsManagerBase):
         Returns:
             A dictionary representation of the settings object.
         """
+        if _load_mashumaro() and isinstance(data, DataClassDictMixin):
+            return data.to_dict()
         if is_dataclass(obj=data):
-            return asdict(obj=data)
+            return _dataclass_to_dict(data)
         return data
 
     def _from_dict(self, data: Dict[str, Any]) -> Type[T]:
@@ -553,5 +1451,56 @@ class SettingsManagerAsDataclass(SettingsManagerBase):
 
         Returns:
             A settings object created from the dictionary.
+
+        Raises:
+            MissingDependencyError: If neither cattrs nor dacite is available.
         """
-        return from_dict(data_class=self._default_settings, data=data)
+        if self._uses_mashumaro:
+            return self._default_settings_type.from_dict(data)
+        # Annotated as a plain type, which mypy accepts as a key for the cache of _flat_fields.
+        settings_type: type = self._default_settings_type
+        flat_fields = _flat_fields(settings_type)
+        if flat_fields is not None:
+            settings = _flat_dataclass_from_dict(
+                cls=settings_type, flat_fields=flat_fields, data=data
+            )
+            if settings is not None:
+                return settings
+        if self._use_msgspec:
+            # msgspec builds the nested dataclasses in a single pass in C, without per-field Python code.
+            # Non-strict mode coerces values such as "2" to the field types, like cattrs does.
+            return msgspec.convert(data, type=self._default_settings_type, strict=False)
+        if _load_cattrs():
+            return self._converter.structure(data, self._default_settings_type)
+        if _load_dacite():
+            return from_dict(data_class=self._default_settings_type, data=data)
+        if self.logger:
+            self.logger.error(
+                msg="Neither the cattrs nor the dacite module is available."
+            )
+        raise MissingDependencyError(
+            "Neither the cattrs nor the dacite module is available."
+        )
+
+    @cached_property
+    def _converter(self) -> Converter:
+        """
+        The cattrs converter used to structure dictionaries into settings objects, created on first use.
+        """
+        return Converter()
+
+    @cached_property
+    def _default_settings_type(self) -> Type[Any]:
+        """
+        The dataclass type of the default settings object.
+        """
+        return type(self._default_settings)
+
+    @cached_property
+    def _uses_mashumaro(self) -> bool:
+        """
+        Whether the default settings type inherits from mashumaro's DataClassDictMixin.
+        """
+        return _load_mashumaro() and issubclass(
+            self._default_settings_type, DataClassDictMixin
+        )
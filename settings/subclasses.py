@@ -17,6 +17,9 @@ class HasSaveMethod(Protocol):
     # fmt: off
     def save(self) -> None:
         ...
+
+    def mark_dirty(self) -> None:
+        ...
     # fmt: on
 
 
@@ -54,13 +57,24 @@ class ChangeDetectingDict(UserDict):
         return self._store[key]
 
     def __setitem__(self, key: str, value: Any) -> None:
+        # Assigning a value equal to the current one, e.g. settings["key"] = settings["key"], does not trigger a save.
+        unchanged: bool = (
+            key in self._store
+            and type(self._store[key]) is type(value)
+            and self._store[key] == value
+        )
         self._store[key] = self._wrap(value=value)
-        if self._parent:
-            self._parent.save()
+        if not unchanged:
+            self._changed()
 
     def __delitem__(self, key: str) -> None:
         del self._store[key]
+        self._changed()
+
+    def _changed(self) -> None:
+        # The parent is told about the change before saving, as the change may not be visible from the parent itself.
         if self._parent:
+            self._parent.mark_dirty()
             self._parent.save()
 
     def __iter__(self) -> Iterator[str]:
@@ -77,6 +91,9 @@ class ChangeDetectingDict(UserDict):
 
 
 class ChangeDetectingList(list):
+    # Lists are usually plentiful in settings data, so their instances skip the per-instance __dict__.
+    __slots__ = ("_store", "_parent", "_autosave_enabled")
+
     def __init__(
         self, parent: Optional[HasSaveMethod] = None, data: Optional[List] = None
     ) -> None:
@@ -109,29 +126,30 @@ class ChangeDetectingList(list):
 
     def __setitem__(self, index: Union[int, slice, SupportsIndex], value: Any) -> None:
         self._store[index] = self._wrap(value=value)
-        if self._parent:
-            self._parent.save()
+        self._changed()
 
     def __delitem__(self, index: Union[int, slice, SupportsIndex]) -> None:
         del self._store[index]
+        self._changed()
+
+    def _changed(self) -> None:
+        # The parent is told about the change before saving, as the change may not be visible from the parent itself.
         if self._parent:
+            self._parent.mark_dirty()
             self._parent.save()
 
     def insert(self, index: SupportsIndex, value: Any) -> None:
         self._store.insert(index, self._wrap(value=value))
-        if self._parent:
-            self._parent.save()
+        self._changed()
 
     def append(self, object: Any) -> None:
         self._store.append(self._wrap(value=object))
-        if self._parent:
-            self._parent.save()
+        self._changed()
 
     def extend(self, iterable: Iterable) -> None:
         for item in iterable:
             self._store.append(self._wrap(value=item))
-        if self._parent:
-            self._parent.save()
+        self._changed()
 
     def __iter__(self) -> Iterator:
         return iter(self._store)
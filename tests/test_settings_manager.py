@@ -1,13 +1,27 @@
+from collections import OrderedDict, defaultdict
+from configparser import ConfigParser
 from logging import Logger
-from os import unlink
+from os import name as os_name, unlink
 from pathlib import Path
-from dataclasses import dataclass
+from subprocess import run
+from sys import executable
+from threading import Thread
+from typing import NamedTuple
+from dataclasses import asdict, dataclass, field
+from unittest.mock import mock_open, patch
+from importlib.util import find_spec
 import unittest
 
 from log_helper.log_helper import LogHelper
-from settings.settings_manager import SettingsManagerAsDict
+from settings.settings_manager import (
+    SettingsManagerAsDict,
+    SettingsManagerAsDataclass,
+    _ini_parser,
+)
+from settings.subclasses import ChangeDetectingList
 from settings.exceptions import (
     UnsupportedFormatError,
+    IniFormatError,
 )
 
 logger: Logger = LogHelper.create_logger(logger_name=__name__, log_file="./tests.log")
@@ -23,7 +37,7 @@ class Section:
 
 @dataclass
 class Settings:
-    section = Section()
+    section: Section = field(default_factory=Section)
 
 
 class TestSettingsManager(unittest.TestCase):
@@ -53,6 +67,18 @@ class TestSettingsManager(unittest.TestCase):
         with self.assertRaises(expected_exception=UnsupportedFormatError):
             SettingsManagerAsDict("settings.txt", default_settings={"key": "value"})
 
+    def test_get_format_ignores_case(self) -> None:
+        # Test that the format is determined from the file extension regardless of its case
+        print("Testing if format is correctly determined from upper case extensions...")
+        for extension, format in [("JSON", "json"), ("Yml", "yaml"), ("TOML", "toml")]:
+            settings_manager = SettingsManagerAsDict(
+                f"settings.{extension}",
+                default_settings=default_settings,
+                logger=logger,
+            )
+            self.assertEqual(first=settings_manager._get_format(), second=format)
+            unlink(path=f"settings.{extension}")
+
     def test_get_settings(self) -> None:
         # Test that we can get the settings from the settings manager like a dictionary
         print("Testing if the correct settings are returned...")
@@ -80,6 +106,39 @@ class TestSettingsManager(unittest.TestCase):
             )
             unlink(path=f"settings.{format}")
 
+    def test_dict_settings_skip_conversion(self) -> None:
+        # Test that dictionary settings are returned and assigned without the conversion methods
+        print("Testing if dictionary settings are accessed without conversion...")
+        for format in formats:
+            settings_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+                f"settings.{format}", default_settings=default_settings, logger=logger
+            )
+            with patch.object(
+                target=SettingsManagerAsDict, attribute="_from_dict"
+            ) as mock_from_dict, patch.object(
+                target=SettingsManagerAsDict, attribute="_to_dict"
+            ) as mock_to_dict:
+                settings_manager.settings = {"section": {"key": "new_value"}}
+                self.assertEqual(
+                    first=settings_manager.settings["section"]["key"],
+                    second="new_value",
+                )
+                mock_from_dict.assert_not_called()
+                mock_to_dict.assert_not_called()
+            unlink(path=f"settings.{format}")
+
+    def test_change_detecting_list_slots(self) -> None:
+        # Test that change detecting lists work without a per-instance __dict__
+        print("Testing if change detecting lists use slots...")
+        change_detecting_list: ChangeDetectingList = ChangeDetectingList(
+            data=["value", ["nested"]]
+        )
+        self.assertFalse(expr=hasattr(change_detecting_list, "__dict__"))
+        change_detecting_list.append("new_value")
+        change_detecting_list._set_autosave(state=False)
+        self.assertEqual(first=list(change_detecting_list)[-1], second="new_value")
+        self.assertIsInstance(obj=change_detecting_list[1], cls=ChangeDetectingList)
+
     def test_delete_settings(self) -> None:
         # Test that we can delete settings from the settings manager like a dictionary
         print("Testing if the settings are correctly deleted...")
@@ -105,6 +164,149 @@ class TestSettingsManager(unittest.TestCase):
             self.assertEqual(first=settings_manager["section"]["key"], second="value")
             unlink(path=f"settings.{format}")
 
+    def test_json_indent(self) -> None:
+        # Test that JSON settings are written compactly when indentation is disabled
+        print("Testing if JSON indentation can be disabled...")
+        settings_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+            "settings.json",
+            default_settings=default_settings,
+            logger=logger,
+            json_indent=None,
+        )
+        self.assertNotIn(member="\n", container=Path("settings.json").read_text())
+        settings_manager = SettingsManagerAsDict(
+            "settings.json", default_settings=default_settings, logger=logger
+        )
+        self.assertEqual(first=settings_manager["section"]["key"], second="value")
+        unlink(path="settings.json")
+
+    def test_json_zero_indent(self) -> None:
+        # Test that an indentation of 0 writes one item per line with both JSON backends, unlike compact JSON
+        print("Testing if a JSON indentation of 0 writes newlines...")
+        for use_orjson in [False, True]:
+            if use_orjson and not find_spec("orjson"):
+                continue
+            SettingsManagerAsDict(
+                "settings.json",
+                default_settings=default_settings,
+                logger=logger,
+                json_indent=0,
+                use_orjson=use_orjson,
+            )
+            self.assertIn(member="\n", container=Path("settings.json").read_text())
+            unlink(path="settings.json")
+
+    def test_json_without_orjson(self) -> None:
+        # Test that JSON settings are saved and loaded with the json module when orjson is unavailable
+        print(
+            "Testing if JSON settings are correctly saved and loaded without orjson..."
+        )
+        with patch("settings.settings_manager.orjson_available", new=False), patch(
+            "settings.settings_manager._load_orjson", return_value=False
+        ):
+            settings_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+                "settings.json", default_settings=default_settings, logger=logger
+            )
+            settings_manager["section"]["key"] = "new_value"
+            settings_manager.save()
+            self.assertIn(
+                member='    "section"', container=Path("settings.json").read_text()
+            )
+            settings_manager = SettingsManagerAsDict(
+                "settings.json", default_settings=default_settings, logger=logger
+            )
+            self.assertEqual(
+                first=settings_manager["section"]["key"], second="new_value"
+            )
+        unlink(path="settings.json")
+
+    def test_json_nan_and_wide_integers(self) -> None:
+        # Test that NaN and integers wider than 64 bits survive a JSON round trip
+        print("Testing if NaN and wide integers are kept in JSON files...")
+        json_settings: dict[str, dict[str, float | int]] = {
+            "section": {"nan": float("nan"), "wide": 2**70}
+        }
+        SettingsManagerAsDict(
+            "settings.json", default_settings=json_settings, logger=logger
+        )
+        settings_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+            "settings.json", default_settings=json_settings, logger=logger
+        )
+        self.assertNotEqual(
+            first=settings_manager["section"]["nan"],
+            second=settings_manager["section"]["nan"],
+        )
+        self.assertEqual(first=settings_manager["section"]["wide"], second=2**70)
+        unlink(path="settings.json")
+
+    @unittest.skipUnless(find_spec("orjson"), "orjson is not installed")
+    def test_orjson_falls_back_to_json(self) -> None:
+        # Test that wide integers are saved, and files with NaN loaded, through the json module when orjson is enabled
+        print("Testing if orjson falls back to the json module...")
+        settings_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+            "settings.json",
+            default_settings={"section": {"wide": 2**70}},
+            logger=logger,
+            use_orjson=True,
+        )
+        self.assertIn(member=str(2**70), container=Path("settings.json").read_text())
+        Path("settings.json").write_text('{"section": {"key": NaN}}')
+        settings_manager.load()
+        self.assertNotEqual(
+            first=settings_manager["section"]["key"],
+            second=settings_manager["section"]["key"],
+        )
+        unlink(path="settings.json")
+
+    def test_toml_none_values(self) -> None:
+        # Test that None values, which TOML cannot represent, are left out of TOML files instead of failing the save
+        print("Testing if None values are left out of TOML files...")
+        settings_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+            "settings.toml",
+            default_settings={"section": {"key": "value", "option": None}},
+            logger=logger,
+        )
+        settings_manager.load()
+        self.assertEqual(
+            first=settings_manager.settings, second={"section": {"key": "value"}}
+        )
+        unlink(path="settings.toml")
+
+    def test_toml_without_tomli_w(self) -> None:
+        # Test that TOML settings are saved with the toml module when tomli_w is unavailable
+        print(
+            "Testing if TOML settings are correctly saved and loaded without tomli_w..."
+        )
+        settings_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+            "settings.toml", default_settings=default_settings, logger=logger
+        )
+        settings_manager["section"]["key"] = "new_value"
+        with patch("settings.settings_manager.tomli_w_available", new=False), patch(
+            "settings.settings_manager.tomli_w", create=True
+        ) as mock_tomli_w:
+            settings_manager.save()
+            mock_tomli_w.dumps.assert_not_called()
+        settings_manager = SettingsManagerAsDict(
+            "settings.toml", default_settings=default_settings, logger=logger
+        )
+        self.assertEqual(first=settings_manager["section"]["key"], second="new_value")
+        unlink(path="settings.toml")
+
+    def test_format_modules_imported_lazily(self) -> None:
+        # Test that only the modules for the chosen format are imported
+        print("Testing if format modules are only imported when needed...")
+        script: str = (
+            "import sys\n"
+            "from settings.settings_manager import SettingsManagerAsDict\n"
+            "SettingsManagerAsDict('settings.json', default_settings={'section': {'key': 'value'}})\n"
+            "print(*sorted(name for name in ('yaml', 'toml', 'tomllib', 'tomli_w') if name in sys.modules))\n"
+        )
+        result = run(
+            [executable, "-c", script], capture_output=True, text=True, check=True
+        )
+        self.assertEqual(first=result.stdout.strip(), second="")
+        unlink(path="settings.json")
+
     def test_all_parameters(self) -> None:
         # Test that we can set all the parameters of the settings manager
         print("Testing if all parameters are correctly set...")
@@ -117,6 +319,8 @@ class TestSettingsManager(unittest.TestCase):
                 autosave_on_exit=True,
                 auto_sanitize=True,
                 format=format,
+                fsync=True,
+                buffer_size=1 << 16,
             )
             self.assertEqual(first=settings_manager["section"]["key"], second="value")
             unlink(path=f"settings.{format}")
@@ -142,6 +346,612 @@ class TestSettingsManager(unittest.TestCase):
             self.assertNotIn(member="new_key", container=settings_manager["section"])
             unlink(path=f"settings.{format}")
 
+    def test_ini_format_validation(self) -> None:
+        # Test that only the INI format requires top-level keys to be sections
+        print("Testing if INI structure is only validated for the INI format...")
+        flat_settings: dict[str, str] = {"key": "value"}
+        self.assertFalse(
+            expr=SettingsManagerAsDict.valid_ini_format(data=flat_settings)
+        )
+        self.assertTrue(
+            expr=SettingsManagerAsDict.valid_ini_format(data=default_settings)
+        )
+        with self.assertRaises(expected_exception=IniFormatError):
+            SettingsManagerAsDict(
+                "settings.ini", default_settings=flat_settings, logger=logger
+            )
+        for format in ["json", "yaml", "toml"]:
+            settings_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+                f"settings.{format}", default_settings=flat_settings, logger=logger
+            )
+            self.assertEqual(first=settings_manager["key"], second="value")
+            unlink(path=f"settings.{format}")
+
+    def test_ini_sections_round_trip(self) -> None:
+        # Test that every section, including keys without values, survives an INI save and load round trip
+        print("Testing if INI sections are correctly saved and loaded...")
+        ini_settings: dict[str, dict[str, str | None]] = {
+            "first": {"key": "value"},
+            "second": {"key": "other_value", "flag": None},
+        }
+        settings_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+            "settings.ini", default_settings=ini_settings, logger=logger
+        )
+        settings_manager = SettingsManagerAsDict(
+            "settings.ini", default_settings=ini_settings, logger=logger
+        )
+        self.assertEqual(first=settings_manager.settings, second=ini_settings)
+        unlink(path="settings.ini")
+
+    def test_ini_deleted_default_key_stays_deleted(self) -> None:
+        # Test that a key inherited from the DEFAULT section is not written back after it was deleted
+        print("Testing if deleted INI DEFAULT keys stay deleted after saving...")
+        Path("settings.ini").write_text(
+            "[DEFAULT]\nshared = value\n\n[section]\nkey = value\n"
+        )
+        settings_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+            "settings.ini", default_settings={}, logger=logger
+        )
+        del settings_manager["section"]["shared"]
+        settings_manager.save()
+        settings_manager.load()
+        self.assertEqual(
+            first=settings_manager.settings, second={"section": {"key": "value"}}
+        )
+        unlink(path="settings.ini")
+
+    def test_ini_default_section_not_shared(self) -> None:
+        # Test that the DEFAULT section of one INI file does not leak into another file through the shared parser
+        print("Testing if INI DEFAULT sections stay with their own file...")
+        Path("settings.ini").write_text(
+            "[DEFAULT]\nshared = leaked\n\n[section]\nkey = value\n"
+        )
+        try:
+            SettingsManagerAsDict("settings.ini", default_settings={}, logger=logger)
+            other_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+                "other_settings.ini", default_settings=default_settings, logger=logger
+            )
+            self.assertEqual(first=other_manager.settings, second=default_settings)
+            other_manager.save()
+            self.assertNotIn(
+                member="DEFAULT", container=Path("other_settings.ini").read_text()
+            )
+        finally:
+            unlink(path="settings.ini")
+            Path("other_settings.ini").unlink(missing_ok=True)
+
+    def test_ini_parser_reused(self) -> None:
+        # Test that INI parsers are shared by all settings managers in a thread, but never between threads
+        print("Testing if the INI parser is reused within a thread...")
+        results: list[str] = []
+
+        def use_managers() -> None:
+            # A new thread has no parser yet, so exactly one is created for all managers in it.
+            settings_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+                "settings.ini", default_settings=default_settings, logger=logger
+            )
+            settings_manager["section"]["key"] = "new_value"
+            settings_manager.save()
+            settings_manager.load()
+            settings_manager = SettingsManagerAsDict(
+                "settings.ini", default_settings=default_settings, logger=logger
+            )
+            results.append(settings_manager["section"]["key"])
+
+        with patch(
+            "settings.settings_manager.ConfigParser", wraps=ConfigParser
+        ) as mock_parser:
+            thread = Thread(target=use_managers)
+            thread.start()
+            thread.join()
+            self.assertEqual(first=mock_parser.call_count, second=1)
+        self.assertEqual(first=results, second=["new_value"])
+        thread_parsers: list[ConfigParser] = []
+        thread = Thread(target=lambda: thread_parsers.append(_ini_parser()))
+        thread.start()
+        thread.join()
+        self.assertIs(expr1=_ini_parser(), expr2=_ini_parser())
+        self.assertIsNot(expr1=thread_parsers[0], expr2=_ini_parser())
+        unlink(path="settings.ini")
+
+    def test_sanitize_without_defaults(self) -> None:
+        # Test that sanitizing without default settings leaves the settings unchanged
+        print("Testing if sanitizing without default settings is skipped...")
+        for format in formats:
+            settings_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+                f"settings.{format}",
+                default_settings={},
+                logger=logger,
+                auto_sanitize=True,
+            )
+            settings_manager.settings = {"section": {"key": "value"}}
+            settings_manager.sanitize_settings()
+            self.assertEqual(first=settings_manager["section"]["key"], second="value")
+            unlink(path=f"settings.{format}")
+
+    def test_sanitize_copies_defaults(self) -> None:
+        # Test that values added by sanitizing are copies, so changing them leaves the default settings untouched
+        print("Testing if sanitizing copies the default settings...")
+        for format in formats:
+            settings_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+                f"settings.{format}",
+                default_settings={"section": {"key": "value"}},
+                logger=logger,
+                auto_sanitize=True,
+            )
+            del settings_manager["section"]
+            settings_manager.sanitize_settings()
+            settings_manager["section"]["key"] = "new_value"
+            self.assertEqual(
+                first=settings_manager._default_settings["section"]["key"],
+                second="value",
+            )
+            unlink(path=f"settings.{format}")
+
+    def test_sanitize_dotted_keys(self) -> None:
+        # Test that keys containing dots are sanitized within their own section
+        print("Testing if keys containing dots are correctly sanitized...")
+        dotted_settings: dict[str, dict[str, str]] = {"a.b": {"c": "value"}}
+        for format in ["json", "yaml", "toml"]:
+            settings_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+                f"settings.{format}",
+                default_settings=dotted_settings,
+                logger=logger,
+                auto_sanitize=True,
+            )
+            settings_manager["a.b"]["stale"] = "value"
+            settings_manager.sanitize_settings()
+            self.assertEqual(first=settings_manager["a.b"], second={"c": "value"})
+            unlink(path=f"settings.{format}")
+
+    def test_dataclass_settings(self) -> None:
+        # Test that dataclass settings survive a save and load round trip
+        print("Testing if dataclass settings are correctly saved and loaded...")
+        for format in formats:
+            settings_manager: SettingsManagerAsDataclass = SettingsManagerAsDataclass(
+                f"settings.{format}", default_settings=Settings(), logger=logger
+            )
+            settings_manager.save()
+            settings_manager = SettingsManagerAsDataclass(
+                f"settings.{format}", default_settings=Settings(), logger=logger
+            )
+            self.assertEqual(first=settings_manager.settings, second=Settings())
+            unlink(path=f"settings.{format}")
+
+    def test_flat_dataclass_settings(self) -> None:
+        # Test that flat dataclass settings are constructed without the conversion libraries, unless the types differ
+        print("Testing if flat dataclass settings are constructed directly...")
+
+        @dataclass
+        class FlatSettings:
+            name: str = "value"
+            count: int = 1
+            enabled: bool = True
+
+        for format in ["json", "yaml", "toml"]:
+            settings_manager: SettingsManagerAsDataclass = SettingsManagerAsDataclass(
+                f"settings.{format}", default_settings=FlatSettings(), logger=logger
+            )
+            self.addCleanup(Path(f"settings.{format}").unlink, missing_ok=True)
+            # cattrs is optional, so the converter stands in for it whether or not it is installed.
+            with patch.object(
+                target=SettingsManagerAsDataclass, attribute="_converter"
+            ) as mock_converter, patch(
+                "settings.settings_manager._load_cattrs", return_value=True
+            ):
+                self.assertEqual(first=settings_manager.settings, second=FlatSettings())
+                mock_converter.structure.assert_not_called()
+                settings_manager["count"] = "2"
+                settings_manager.settings
+                mock_converter.structure.assert_called_once()
+
+    @unittest.skipUnless(find_spec("msgspec"), "msgspec is not installed")
+    def test_msgspec_dataclass_settings(self) -> None:
+        # Test that nested dataclass settings are constructed with msgspec only when it is requested
+        print("Testing if dataclass settings are constructed with msgspec...")
+        import msgspec
+
+        for format in formats:
+            with patch("msgspec.convert", wraps=msgspec.convert) as mock_convert:
+                SettingsManagerAsDataclass(
+                    f"settings.{format}", default_settings=Settings(), logger=logger
+                ).settings
+                mock_convert.assert_not_called()
+                settings_manager: SettingsManagerAsDataclass = (
+                    SettingsManagerAsDataclass(
+                        f"settings.{format}",
+                        default_settings=Settings(),
+                        logger=logger,
+                        use_msgspec=True,
+                    )
+                )
+                settings = settings_manager.settings
+                mock_convert.assert_called_once()
+            self.assertEqual(first=settings, second=Settings())
+            self.assertIsInstance(settings.section, Section)
+            unlink(path=f"settings.{format}")
+
+    def test_dataclass_to_dict(self) -> None:
+        # Test that settings objects are converted like asdict, without sharing mutable values
+        print(
+            "Testing if dataclass settings are correctly converted to dictionaries..."
+        )
+
+        @dataclass
+        class NestedSettings:
+            sections: list[Section] = field(default_factory=lambda: [Section()])
+            tags: list[str] = field(default_factory=lambda: ["tag"])
+
+        settings = NestedSettings()
+        for format in formats:
+            settings_manager: SettingsManagerAsDataclass = SettingsManagerAsDataclass(
+                f"settings.{format}", default_settings=Settings(), logger=logger
+            )
+            converted = settings_manager._to_dict(data=settings)
+            self.assertEqual(first=converted, second=asdict(obj=settings))
+            self.assertIsNot(expr1=converted["tags"], expr2=settings.tags)
+            unlink(path=f"settings.{format}")
+
+    def test_dataclass_to_dict_container_subclasses(self) -> None:
+        # Test that dataclasses nested in mapping subclasses and named tuples are converted like asdict
+        print(
+            "Testing if dataclasses within container subclasses are converted to dictionaries..."
+        )
+
+        class Pair(NamedTuple):
+            first: Section
+            second: Section
+
+        @dataclass
+        class ContainerSettings:
+            ordered: OrderedDict = field(
+                default_factory=lambda: OrderedDict(section=Section())
+            )
+            pair: Pair = field(default_factory=lambda: Pair(Section(), Section()))
+
+        @dataclass
+        class DefaultDictSettings:
+            default: defaultdict = field(
+                default_factory=lambda: defaultdict(list, section=Section())
+            )
+
+        settings_manager: SettingsManagerAsDataclass = SettingsManagerAsDataclass(
+            "settings.json", default_settings=Settings(), logger=logger
+        )
+        settings = ContainerSettings()
+        converted = settings_manager._to_dict(data=settings)
+        self.assertEqual(first=converted, second=asdict(obj=settings))
+        self.assertIsInstance(converted["ordered"]["section"], dict)
+        self.assertEqual(first=type(converted["pair"]), second=Pair)
+        # asdict only supports defaultdict from Python 3.12, so the expected result is spelled out.
+        converted = settings_manager._to_dict(data=DefaultDictSettings())
+        self.assertEqual(
+            first=converted, second={"default": {"section": {"key": "value"}}}
+        )
+        self.assertEqual(first=converted["default"].default_factory, second=list)
+        unlink(path="settings.json")
+
+    def test_invalidate_defaults(self) -> None:
+        # Test that changes to the default settings object are picked up after invalidating the cached defaults
+        print(
+            "Testing if invalidating the defaults picks up changed default settings..."
+        )
+        for format in formats:
+            defaults = Settings()
+            settings_manager: SettingsManagerAsDataclass = SettingsManagerAsDataclass(
+                f"settings.{format}", default_settings=defaults, logger=logger
+            )
+            defaults.section.key = "new_value"
+            self.assertEqual(
+                first=settings_manager._default_settings_as_dict["section"]["key"],
+                second="value",
+            )
+            settings_manager.invalidate_defaults()
+            self.assertEqual(
+                first=settings_manager._default_settings_as_dict["section"]["key"],
+                second="new_value",
+            )
+            unlink(path=f"settings.{format}")
+
+    def test_unchanged_save_skips_write(self) -> None:
+        # Test that saving unchanged settings does not rewrite the file, unless the file is gone
+        print("Testing if unchanged settings are not rewritten...")
+        for format in formats:
+            settings_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+                f"settings.{format}", default_settings=default_settings, logger=logger
+            )
+            with patch.object(
+                target=settings_manager, attribute="_replace_file"
+            ) as mock_replace_file:
+                settings_manager.save()
+                mock_replace_file.assert_not_called()
+            unlink(path=f"settings.{format}")
+            settings_manager.save()
+            self.assertTrue(expr=Path(f"settings.{format}").exists())
+            unlink(path=f"settings.{format}")
+
+    def test_unchanged_save_after_load_skips_write(self) -> None:
+        # Test that saving freshly loaded, unchanged settings does not rewrite the file
+        print("Testing if unchanged settings are not rewritten after loading...")
+        for format in formats:
+            SettingsManagerAsDict(
+                f"settings.{format}", default_settings=default_settings, logger=logger
+            )
+            settings_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+                f"settings.{format}", default_settings=default_settings, logger=logger
+            )
+            with patch.object(
+                target=settings_manager, attribute="_replace_file"
+            ) as mock_replace_file:
+                settings_manager.save()
+                mock_replace_file.assert_not_called()
+            settings_manager["section"]["key"] = "new_value"
+            settings_manager.save()
+            settings_manager = SettingsManagerAsDict(
+                f"settings.{format}", default_settings=default_settings, logger=logger
+            )
+            self.assertEqual(
+                first=settings_manager["section"]["key"], second="new_value"
+            )
+            unlink(path=f"settings.{format}")
+
+    def test_save_writes_once(self) -> None:
+        # Test that the serialized settings are written to the file in a single call
+        print("Testing if settings are written to the file in a single call...")
+        for format in formats:
+            settings_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+                f"settings.{format}", default_settings=default_settings, logger=logger
+            )
+            settings_manager["section"]["key"] = "new_value"
+            with patch(
+                "settings.settings_manager.fdopen", new=mock_open()
+            ) as mock_file, patch(
+                "settings.settings_manager.replace",
+                side_effect=lambda source, target: Path(source).unlink(),
+            ):
+                settings_manager.save()
+                mock_file().write.assert_called_once()
+            unlink(path=f"settings.{format}")
+
+    @unittest.skipUnless(os_name == "posix", "file permissions are POSIX-specific")
+    def test_save_keeps_file_mode(self) -> None:
+        # Test that replacing the settings file on save keeps its permissions
+        print("Testing if saving keeps the permissions of the settings file...")
+        for format in formats:
+            settings_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+                f"settings.{format}", default_settings=default_settings, logger=logger
+            )
+            Path(f"settings.{format}").chmod(0o600)
+            settings_manager["section"]["key"] = "new_value"
+            settings_manager.save()
+            self.assertEqual(
+                first=Path(f"settings.{format}").stat().st_mode & 0o777, second=0o600
+            )
+            unlink(path=f"settings.{format}")
+
+    def test_save_follows_symlink(self) -> None:
+        # Test that saving through a symlinked path replaces the file it points to, and keeps the link
+        print("Testing if saving through a symlink keeps the link...")
+        for format in formats:
+            link: Path = Path(f"linked_settings.{format}")
+            try:
+                link.symlink_to(f"settings.{format}")
+            except OSError:
+                self.skipTest(reason="symlinks are not supported")
+            try:
+                settings_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+                    str(link), default_settings=default_settings, logger=logger
+                )
+                settings_manager["section"]["key"] = "new_value"
+                settings_manager.save()
+                self.assertTrue(link.is_symlink())
+                settings_manager = SettingsManagerAsDict(
+                    f"settings.{format}",
+                    default_settings=default_settings,
+                    logger=logger,
+                )
+                self.assertEqual(
+                    first=settings_manager["section"]["key"], second="new_value"
+                )
+            finally:
+                link.unlink()
+                Path(f"settings.{format}").unlink(missing_ok=True)
+
+    def test_concurrent_saves(self) -> None:
+        # Test that threads saving the same file never interfere with each other's temporary files
+        print("Testing if concurrent saves of the same file succeed...")
+        errors: list[Exception] = []
+
+        def save_repeatedly(settings_manager: SettingsManagerAsDict) -> None:
+            try:
+                for index in range(200):
+                    settings_manager["section"]["key"] = f"value_{index}"
+                    settings_manager.save()
+            except Exception as e:
+                errors.append(e)
+
+        settings_managers: list[SettingsManagerAsDict] = [
+            SettingsManagerAsDict(
+                "settings.json", default_settings=default_settings, logger=logger
+            )
+            for _ in range(4)
+        ]
+        threads: list[Thread] = [
+            Thread(target=save_repeatedly, args=(settings_manager,))
+            for settings_manager in settings_managers
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(first=errors, second=[])
+        self.assertEqual(first=list(Path(".").glob(".settings.json.*.tmp")), second=[])
+        unlink(path="settings.json")
+
+    def test_json_writer_override(self) -> None:
+        # Test that a subclass can override how JSON files are written
+        print("Testing if an overridden JSON writer is used on save...")
+
+        class CustomManager(SettingsManagerAsDict):
+            def _write_as_json(self, data, file) -> None:
+                file.write(b'{"section": {"key": "custom"}}')
+
+        settings_manager: CustomManager = CustomManager(
+            "settings.json", default_settings=default_settings, logger=logger
+        )
+        settings_manager.load()
+        self.assertEqual(first=settings_manager["section"]["key"], second="custom")
+        unlink(path="settings.json")
+
+    def test_clean_save_skips_serialization(self) -> None:
+        # Test that saving without any changes since the last save skips serializing, until the settings are marked as changed
+        print("Testing if saving unchanged settings skips serialization...")
+        for format in formats:
+            settings_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+                f"settings.{format}", default_settings=default_settings, logger=logger
+            )
+            with patch.object(
+                target=settings_manager, attribute="_write_fn"
+            ) as mock_write, patch.object(
+                target=settings_manager, attribute="_dump_json"
+            ) as mock_dump:
+                settings_manager.save()
+                mock_write.assert_not_called()
+                mock_dump.assert_not_called()
+            settings_manager.mark_dirty()
+            with patch.object(
+                target=settings_manager, attribute="_replace_file"
+            ) as mock_replace_file:
+                settings_manager.save()
+                mock_replace_file.assert_not_called()
+            settings_manager["section"]["key"] = "new_value"
+            settings_manager.save()
+            settings_manager = SettingsManagerAsDict(
+                f"settings.{format}", default_settings=default_settings, logger=logger
+            )
+            self.assertEqual(
+                first=settings_manager["section"]["key"], second="new_value"
+            )
+            unlink(path=f"settings.{format}")
+
+    def test_fsync_on_save(self) -> None:
+        # Test that the file and its directory are only flushed to disk when fsync is enabled
+        print("Testing if fsync is only used when enabled...")
+        for format in formats:
+            settings_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+                f"settings.{format}", default_settings=default_settings, logger=logger
+            )
+            with patch("settings.settings_manager.fsync") as mock_fsync:
+                settings_manager["section"]["key"] = "new_value"
+                settings_manager.save()
+                mock_fsync.assert_not_called()
+            unlink(path=f"settings.{format}")
+            settings_manager = SettingsManagerAsDict(
+                f"settings.{format}",
+                default_settings=default_settings,
+                logger=logger,
+                fsync=True,
+            )
+            with patch("settings.settings_manager.fsync") as mock_fsync:
+                settings_manager["section"]["key"] = "new_value"
+                settings_manager.save()
+                # The file is flushed, and on POSIX the directory holding it as well.
+                self.assertEqual(
+                    first=mock_fsync.call_count, second=2 if os_name == "posix" else 1
+                )
+            unlink(path=f"settings.{format}")
+
+    def test_unchanged_file_parsed_once(self) -> None:
+        # Test that a file is only parsed once per process while its contents are unchanged, and that managers do not share the parsed data
+        print("Testing if unchanged settings files are only parsed once...")
+        cached_settings: dict[str, dict[str, str]] = {"section": {"key": "cached"}}
+        for format in formats:
+            SettingsManagerAsDict(
+                f"settings.{format}", default_settings=cached_settings, logger=logger
+            )
+            read_method = getattr(SettingsManagerAsDict, f"_read_as_{format}")
+            with patch.object(
+                target=SettingsManagerAsDict,
+                attribute=f"_read_as_{format}",
+                autospec=True,
+                side_effect=read_method,
+            ) as mock_read:
+                first_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+                    f"settings.{format}",
+                    default_settings=cached_settings,
+                    logger=logger,
+                )
+                second_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+                    f"settings.{format}",
+                    default_settings=cached_settings,
+                    logger=logger,
+                )
+                self.assertEqual(first=mock_read.call_count, second=1)
+            first_manager.settings["section"]["key"] = "new_value"
+            self.assertEqual(first=second_manager["section"]["key"], second="cached")
+            unlink(path=f"settings.{format}")
+
+    def test_peek(self) -> None:
+        # Test that we can read selected top-level keys without loading the settings
+        print("Testing if peeking returns only the requested keys...")
+        peek_settings: dict[str, dict[str, str]] = {
+            "version": {"number": "1"},
+            "section": {"key": "value"},
+        }
+        for format in formats:
+            settings_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+                f"settings.{format}", default_settings=peek_settings, logger=logger
+            )
+            self.assertEqual(
+                first=settings_manager.peek(keys=["version", "missing"]),
+                second={"version": {"number": "1"}},
+            )
+            unlink(path=f"settings.{format}")
+
+    def test_peek_matches_load(self) -> None:
+        # Test that peeking agrees with loading for empty YAML files and trailing INI DEFAULT sections
+        print("Testing if peeking returns the same values as loading...")
+        settings_manager: SettingsManagerAsDict = SettingsManagerAsDict(
+            "settings.yaml", default_settings=default_settings, logger=logger
+        )
+        Path("settings.yaml").write_text("")
+        self.assertEqual(first=settings_manager.peek(keys=["section"]), second={})
+        unlink(path="settings.yaml")
+
+        Path("settings.ini").write_text(
+            "[section]\nkey = value\n\n[other]\nkey = other\n\n[DEFAULT]\nshared = default\n"
+        )
+        settings_manager = SettingsManagerAsDict(
+            "settings.ini", default_settings={}, logger=logger
+        )
+        self.assertEqual(
+            first=settings_manager.peek(keys=["section"]),
+            second={"section": settings_manager.settings["section"]},
+        )
+        self.assertEqual(
+            first=settings_manager.peek(keys=["section"]),
+            second={"section": {"key": "value", "shared": "default"}},
+        )
+        unlink(path="settings.ini")
+
+    def test_save_does_not_convert_settings(self) -> None:
+        # Test that saving and sanitizing work on the stored dictionary without converting the settings object
+        print("Testing if saving avoids converting dataclass settings...")
+        for format in formats:
+            settings_manager: SettingsManagerAsDataclass = SettingsManagerAsDataclass(
+                f"settings.{format}",
+                default_settings=Settings(),
+                logger=logger,
+                auto_sanitize=True,
+            )
+            with patch.object(
+                target=SettingsManagerAsDataclass, attribute="_to_dict"
+            ) as mock_to_dict:
+                settings_manager.sanitize_settings()
+                settings_manager.save()
+                mock_to_dict.assert_not_called()
+            unlink(path=f"settings.{format}")
+
 
 if __name__ == "__main__":
     unittest.main()